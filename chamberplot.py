@@ -9,6 +9,9 @@ from matplotlib import rcParams
 import xml.etree.ElementTree as ET
 from copy import deepcopy
 import os
+import gzip, lzma, bz2
+import math
+from concurrent.futures import ProcessPoolExecutor
 
 # Set default font
 rcParams["font.sans-serif"] = ["Ubuntu"]
@@ -49,58 +52,96 @@ def generate_mass_palette(masses):
 
 x_label_cmap = matplotlib.cm.get_cmap("viridis") # color gradient used for event lines
 
+COMPRESSED_OPENERS = { # file extension: function that opens that kind of compressed file
+    ".gz": gzip.open,
+    ".xz": lzma.open,
+    ".bz2": bz2.open
+}
+
 scans_cache = {} # Caches parsed scans in case you want to retry a plot without reading files again.
 
+def open_scan_file(scan_path):
+    """
+    Opens the file at scan_path for reading as text.
+    Compressed scan files (see COMPRESSED_OPENERS) are decompressed as they're read,
+    so they never have to be inflated all at once.
+    """
+    opener = COMPRESSED_OPENERS.get(os.path.splitext(scan_path)[1], open)
+    return opener(scan_path, "rt")
+
+def get_scan_paths(scans_dir):
+    """
+    Returns the paths of every scan file in scans_dir, sorted chronologically, compressed or not.
+    If a scan is there both compressed and uncompressed (because it's being archived), only the uncompressed one is used.
+    """
+    filenames = [i for i in os.listdir(scans_dir) if i.startswith("MassSpecData")]
+    uncompressed = set(filenames)
+    return sorted(
+        scans_dir + "/" + i for i in filenames
+        if os.path.splitext(i)[0] not in uncompressed # skip the compressed copy of an uncompressed file
+    )
+
+def iter_scans(scan_path, normalize_time=False, parse_times=True):
+    """
+    Reads the file at scan_path and yields its scans one at a time, as they're read.
+    Each scan is a tuple of (xml_data, rows), like parse_scans returns.
+    Only one scan is held in memory at a time, so this is better than parse_scans
+    for going through lots of data once. Nothing is cached.
+    Parsing timestamps takes most of the time, so if you don't need them,
+    set parse_times to false and every row's time will be None.
+    """
+    xml_lines = None
+    rows = []
+    t_0 = None
+    with open_scan_file(scan_path) as file:
+        for line in file:
+            if line.startswith("<?"): # start of a new scan's xml header
+                if xml_lines is not None:
+                    yield ET.fromstring("".join(xml_lines)), rows
+                xml_lines = [line]
+                rows = []
+                t_0 = None
+            elif not line[:1].isdigit(): # still in the xml header
+                if xml_lines is not None:
+                    xml_lines.append(line)
+            else:
+                # t means time, m means mass, p means pressure
+                raw_t, raw_m, raw_p = [i.strip() for i in line.rstrip()[:-1].split(", ")]
+
+                if parse_times:
+                    t = datetime.datetime.strptime(raw_t, "%Y/%m/%d %H:%M:%S.%f")
+                    if normalize_time:
+                        t = t.timestamp()
+                    if t_0 is None:
+                        t_0 = t
+                    if normalize_time:
+                        t = t - t_0
+                else:
+                    t = None
+
+                m = float(raw_m)
+                p = float(raw_p)
+
+                rows.append([t, m, p])
+
+    if xml_lines is not None:
+        yield ET.fromstring("".join(xml_lines)), rows
+
 def parse_scans(scan_path, normalize_time=False):
     """
     Reads the file at scan_path and outputs a list of scans,
     where each scan is a tuple of (xml_data, rows).
     xml_data is an xml tree of the scan's metadata.
     rows is a list of tuples of (time, mass, pressure) representing the data points.
-    skip_xml should be true if you don't need to parse the xml.
+    The file can be compressed; see open_scan_file.
 
     This should probably be restructured so it makes a dictionary of the
     important xml information instead of returning the whole xml root.
     """
     if scan_path in scans_cache:
         return scans_cache[scan_path]
-    
-    with open(scan_path) as file: #scans_path? path?
-        raw_scans = file.read()[:-1]
-
-    scans = []
 
-    for raw_scan in ["<?" + i for i in raw_scans.split("<?")][1:]:
-
-        xml_length = raw_scan.rindex(">") + 1
-        xml_part, csv_part = raw_scan[:xml_length], raw_scan[xml_length + 1:].strip()
-        xml_root = ET.fromstring(xml_part)
-
-        #xml_info = {
-        #    "DateTime": xml_root.find("ConfigurationParameters").get("DateTime"),
-
-        raw_rows = csv_part.split("\n")
-        
-        rows = []
-        t_0 = None
-        for raw_row in raw_rows:
-            # t means time, m means mass, p means pressure
-            raw_t, raw_m, raw_p = [i.strip() for i in raw_row[:-1].split(", ")]
-            
-            t = datetime.datetime.strptime(raw_t, "%Y/%m/%d %H:%M:%S.%f")
-            if normalize_time:
-                t = t.timestamp()
-            if t_0 is None:
-                t_0 = t
-            if normalize_time:
-                t = t - t_0
-
-            m = float(raw_m)            
-            p = float(raw_p)
-            
-            rows.append([t, m, p])
-        
-        scans.append((xml_root, rows))
+    scans = list(iter_scans(scan_path, normalize_time))
 
     # Make a fresh copy for the cache.
     # This way it won't get messed up when other functions modify rows.
@@ -284,6 +325,185 @@ def plot_combined_trend(scan_paths, masses, x_labels={}, pressure_floor=2e-10, t
     )
 
 
+class SpectrumStats:
+    """
+    Per-mass summary statistics of pressure over any number of sweeps, kept in bounded memory.
+    Use add_scan to feed it sweeps one at a time, and merge to combine partial results,
+    like ones computed in separate processes by sweep_statistics.
+
+    Pressures are counted in log-spaced bins, so quantiles are approximate:
+    between min_pressure and max_pressure they're accurate to within a bin,
+    which is about 12% with the default of 20 bins per decade.
+    Outside that range they're clamped: quantiles that land among zero or negative readings
+    (which trend scans have when the signal is in the noise) come out as 0,
+    ones among positive readings below min_pressure come out as min_pressure,
+    and ones above max_pressure come out as the maximum.
+    Counts, means, minimums and maximums are exact.
+    """
+
+    def __init__(self, bins_per_decade=20, min_pressure=1e-14, max_pressure=1):
+        self.bins_per_decade = bins_per_decade
+        self.min_pressure = min_pressure
+        self.max_pressure = max_pressure
+        self.log_min = math.log10(min_pressure)
+        # Bin 0 counts zero and negative pressures, bin 1 counts positive ones below min_pressure,
+        # and the last bin counts ones above max_pressure.
+        self.n_bins = round((math.log10(max_pressure) - self.log_min) * bins_per_decade) + 3
+        self.counts = {} # mass: list of bin counts
+        self.totals = {} # mass: [count, sum, min, max]
+
+    def bin_index(self, pressure):
+        if pressure <= 0:
+            return 0
+        if pressure < self.min_pressure:
+            return 1
+        return min(int((math.log10(pressure) - self.log_min) * self.bins_per_decade) + 2, self.n_bins - 1)
+
+    def add(self, mass, pressure):
+        if mass not in self.counts:
+            self.counts[mass] = [0] * self.n_bins
+            self.totals[mass] = [0, 0.0, pressure, pressure]
+        self.counts[mass][self.bin_index(pressure)] += 1
+        totals = self.totals[mass]
+        totals[0] += 1
+        totals[1] += pressure
+        totals[2] = min(totals[2], pressure)
+        totals[3] = max(totals[3], pressure)
+
+    def add_scan(self, scan):
+        """
+        Adds every data point in a scan, as returned by parse_scans or iter_scans.
+        """
+        xml_root, rows = scan
+        for t, m, p in rows:
+            self.add(m, p)
+
+    def merge(self, other):
+        """
+        Adds everything counted by other, which must use the same bins, into this one.
+        """
+        if (other.bins_per_decade, other.min_pressure, other.max_pressure) != (self.bins_per_decade, self.min_pressure, self.max_pressure):
+            raise ValueError("Can't merge SpectrumStats with different bins.")
+        for mass, other_counts in other.counts.items():
+            if mass not in self.counts:
+                self.counts[mass] = list(other_counts)
+                self.totals[mass] = list(other.totals[mass])
+                continue
+            counts = self.counts[mass]
+            for i, count in enumerate(other_counts):
+                counts[i] += count
+            totals, other_totals = self.totals[mass], other.totals[mass]
+            totals[0] += other_totals[0]
+            totals[1] += other_totals[1]
+            totals[2] = min(totals[2], other_totals[2])
+            totals[3] = max(totals[3], other_totals[3])
+        return self
+
+    def masses(self):
+        return sorted(self.counts)
+
+    def mean(self, mass):
+        count, total, minimum, maximum = self.totals[mass]
+        return total / count
+
+    def quantile(self, mass, q):
+        """
+        Returns the approximate qth quantile (between 0 and 1) of the pressures recorded for mass.
+        """
+        count, total, minimum, maximum = self.totals[mass]
+        target = q * (count - 1) # 0-based rank of the point we want
+        seen = 0
+        for i, bin_count in enumerate(self.counts[mass]):
+            if bin_count and seen + bin_count > target:
+                break
+            seen += bin_count
+        if i == 0:
+            return 0.0
+        if i == 1:
+            return self.min_pressure
+        if i == self.n_bins - 1:
+            return maximum
+        # Interpolate geometrically within the bin.
+        fraction = (target - seen + 0.5) / bin_count
+        pressure = 10 ** (self.log_min + (i - 2 + fraction) / self.bins_per_decade)
+        return min(max(pressure, minimum), maximum)
+
+    def summary(self, quantiles=(0.05, 0.25, 0.5, 0.75, 0.95)):
+        """
+        Returns a dictionary of the form {mass: {"count", "mean", "min", "max", "quantiles": {q: pressure}}}.
+        """
+        return {
+            mass: {
+                "count": self.totals[mass][0],
+                "mean": self.mean(mass),
+                "min": self.totals[mass][2],
+                "max": self.totals[mass][3],
+                "quantiles": {q: self.quantile(mass, q) for q in quantiles}
+            } for mass in self.masses()
+        }
+
+def sweep_statistics(scan_paths, jobs=1, include_trends=False, **stats_kwargs):
+    """
+    Summarizes every sweep in scan_paths into a SpectrumStats, in one pass and without keeping the sweeps around.
+    Use this instead of parse_scans to find a "typical" chamber spectrum over a long series of sweeps,
+    like the one in sweep_series_paths.txt.
+    jobs is the number of processes to split the files between (None means one per CPU).
+    Trend scans are skipped unless include_trends is true.
+    stats_kwargs are passed on to SpectrumStats.
+    """
+    scan_paths = list(scan_paths)
+    if jobs == 1 or len(scan_paths) < 2:
+        stats = SpectrumStats(**stats_kwargs)
+        for scan_path in scan_paths:
+            for scan in iter_scans(scan_path, parse_times=False): # SpectrumStats doesn't use the times
+                if include_trends or scan[0].find("OperatingParameters").get("Mode") != "Trend":
+                    stats.add_scan(scan)
+        return stats
+
+    # Each process summarizes its own share of the files, then the partial results get merged.
+    n_chunks = min(jobs or os.cpu_count(), len(scan_paths))
+    stats = SpectrumStats(**stats_kwargs)
+    with ProcessPoolExecutor(max_workers=n_chunks) as executor:
+        futures = [
+            executor.submit(sweep_statistics, scan_paths[i::n_chunks], 1, include_trends, **stats_kwargs)
+            for i in range(n_chunks)
+        ]
+        for future in futures:
+            stats.merge(future.result())
+    return stats
+
+def plot_spectrum_bands(scan, stats, bands=((0.05, 0.95), (0.25, 0.75)), pressure_floor=2e-10, title=None, plot_kwargs={}):
+    """
+    Plots a sweep (parsed with parse_scans) over the spread of a SpectrumStats,
+    so you can see how it compares to a typical sweep.
+    bands is an iterable of (low, high) quantile pairs to shade between; the median is drawn as a line.
+    Masses where a quantile comes out as 0 are left out of that band, since they can't go on the log axis.
+    """
+    fig = plot_parsed_scan(scan, pressure_floor=pressure_floor, title=title, plot_kwargs=plot_kwargs)
+    ax = fig.axes[0]
+    ax.lines[0].set_label("this sweep")
+
+    masses = [m for m in stats.masses() if m != 999] # total pressure isn't part of the spectrum
+    def positive_quantiles(q): # non-positive values become nan, which matplotlib leaves gaps for
+        return [p if p > 0 else float("nan") for p in (stats.quantile(m, q) for m in masses)]
+
+    band_cmap = matplotlib.cm.get_cmap("Greys")
+    for i, (low, high) in enumerate(bands):
+        ax.fill_between(
+            masses,
+            positive_quantiles(low),
+            positive_quantiles(high),
+            color=band_cmap(0.3 + 0.4 * i / len(bands)),
+            alpha=0.5,
+            linewidth=0,
+            zorder=0.5,
+            label="{:g}% to {:g}% of sweeps".format(low * 100, high * 100)
+        )
+    ax.plot(masses, positive_quantiles(0.5), color="black", linewidth=0.8, zorder=0.6, label="median")
+    ax.legend()
+    return fig
+
+
 
 if 0:
     with open("sweep_series_paths.txt") as file:
@@ -305,14 +525,13 @@ if 0:
     plt.plot(modified_times, first_row_times)
 
 
-if 1:
+if __name__ == "__main__":
     max_mass = 200
     masses = [i for i in range(1, max_mass) if i != 5]
     mass_cmap = matplotlib.cm.get_cmap("turbo")
     mass_palette = {mass: mass_cmap(i / len(masses)) for i, mass in enumerate(masses)}
     for m in masses:
-        scan_paths = ["rga-3-10/" + i for i in os.listdir("rga-3-10") if i.startswith("MassSpecData")]
-        scan_paths.sort()
+        scan_paths = get_scan_paths("rga-3-10")
         fig = plot_combined_trend(
             scan_paths[4:-1],
             (m,),
@@ -344,8 +563,7 @@ if 1:
 
 
 if 0:
-    scan_paths = ["rga-3-10/" + i for i in os.listdir("rga-3-10") if i.startswith("MassSpecData")]
-    scan_paths.sort()
+    scan_paths = get_scan_paths("rga-3-10")
     fig = plot_combined_trend(
         scan_paths[4:-1],
         (32, 33, 34, 178),
@@ -0,0 +1,96 @@
+"""
+Compresses closed RGA scan files so the archive takes up less space.
+chamberplot reads the compressed files just like the uncompressed ones.
+
+Usage: python chamberplot_archive.py rga_data [--format gz|xz|bz2] [-j JOBS] [--min-age SECONDS] [--keep]
+
+The most recent scan file in the directory is never compressed, since the RGA
+(and chamberplot_stream.py) may still be using it. Neither is anything modified
+within the last --min-age seconds.
+"""
+
+import argparse
+import bz2, gzip, lzma
+import os
+import shutil
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+COMPRESSORS = { # format: function that opens a file of that format
+    "gz": gzip.open,
+    "xz": lzma.open,
+    "bz2": bz2.open
+}
+CHUNK_SIZE = 1 << 20 # compress this many bytes at a time, so big files aren't read into memory all at once
+
+def closed_scan_paths(scans_dir, min_age=60):
+    """
+    Returns the paths of uncompressed scan files in scans_dir that are safe to compress:
+    everything but the most recent file, as long as it hasn't been modified in the last min_age seconds.
+    """
+    compressed_extensions = tuple("." + i for i in COMPRESSORS)
+    filenames = sorted(
+        i for i in os.listdir(scans_dir)
+        if i.startswith("MassSpecData") and not i.endswith(compressed_extensions)
+    )
+    cutoff = time.time() - min_age
+    scan_paths = [os.path.join(scans_dir, i) for i in filenames[:-1]] # filenames[-1] is the live scan
+    return [i for i in scan_paths if os.path.getmtime(i) < cutoff]
+
+def compress_scan_file(scan_path, compression="gz", keep=False):
+    """
+    Compresses the file at scan_path into scan_path + "." + compression, then deletes the original unless keep is true.
+    The compressed file is written under a temporary name first, so nothing ever sees a half-written archive.
+    Returns the sizes of the file before and after compression.
+    """
+    compressed_path = scan_path + "." + compression
+    directory, filename = os.path.split(compressed_path)
+    temp_path = os.path.join(directory, ".tmp-" + filename) # doesn't start with "MassSpecData", so it's ignored until it's done
+
+    with open(scan_path, "rb") as source, COMPRESSORS[compression](temp_path, "wb") as destination:
+        shutil.copyfileobj(source, destination, CHUNK_SIZE)
+    shutil.copystat(scan_path, temp_path) # keep the modification time
+    os.replace(temp_path, compressed_path)
+
+    size_before, size_after = os.path.getsize(scan_path), os.path.getsize(compressed_path)
+    if not keep:
+        os.remove(scan_path)
+    return size_before, size_after
+
+def archive(scans_dir, compression="gz", jobs=None, min_age=60, keep=False):
+    """
+    Compresses every closed scan file in scans_dir, using jobs worker processes (defaults to one per CPU).
+    Returns the total sizes of the files before and after compression.
+    """
+    scan_paths = closed_scan_paths(scans_dir, min_age)
+    total_before = total_after = 0
+    workers = jobs or os.cpu_count()
+    chunksize = max(1, len(scan_paths) // (workers * 4)) # big enough to cut overhead, small enough to keep every worker busy
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        results = executor.map(
+            compress_scan_file,
+            scan_paths,
+            [compression] * len(scan_paths),
+            [keep] * len(scan_paths),
+            chunksize=chunksize
+        )
+        for scan_path, (size_before, size_after) in zip(scan_paths, results):
+            total_before += size_before
+            total_after += size_after
+    print("Compressed {} files from {:.1f} MB to {:.1f} MB.".format(len(scan_paths), total_before / 1e6, total_after / 1e6))
+    return total_before, total_after
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compress closed RGA scan files.")
+    parser.add_argument("scans_dir", help="directory the RGA saves files into")
+    parser.add_argument("--format", choices=COMPRESSORS, default="gz", help="compression format (default: gz)")
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="number of worker processes (default: one per CPU)")
+    parser.add_argument("--min-age", type=float, default=60, help="skip files modified in the last this many seconds (default: 60)")
+    parser.add_argument("--keep", action="store_true", help="keep the uncompressed files")
+    args = parser.parse_args(argv)
+    archive(args.scans_dir, args.format, args.jobs, args.min_age, args.keep)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,224 @@
+"""
+Renders figures listed in a job file, without opening any windows.
+
+Usage: python chamberplot_batch.py chamberplot_jobs.json [-j JOBS] [--force] [figure names...]
+
+The job file is JSON with a list of figures. Each figure looks something like this:
+{
+    "name": "sputtering_run",
+    "function": "plot",                  # or "plot_combined_trend"
+    "inputs": ["rga_data/MassSpecData-06507-20210210-171042.csv"],
+    "scan_index": 6,                     # plot only
+    "masses": [32, 33, 34, 178],         # plot_combined_trend only
+    "title": "One Round of Sputtering",
+    "pressure_floor": 2e-10,
+    "x_labels": {"181": "turned on ion gun filament"},
+    "limits": {"x": ["3/10/2021 15:30", "3/10/2021 20:45"], "y": [1e-9, 1e-5]},
+    "plot_kwargs": {"linestyle": "", "marker": "."},
+    "size": [9, 7],
+    "subplots_adjust": {"top": 0.83, "right": 0.83},
+    "dpi": 256,
+    "outputs": ["figures/sputtering_run.png", "figures/sputtering_run.svg"]
+}
+Inputs can be glob patterns, which get expanded and sorted (so chronologically, for RGA filenames).
+"inputs_slice": [4, -1] trims the expanded list, like scan_paths[4:-1] would.
+x_labels keys and x limits are either numbers or timestamps like "3/10/2021 15:39".
+
+A figure is skipped if its spec, its input files, chamberplot.py and this file haven't changed
+since it was last rendered and all of its outputs still exist.
+"""
+
+import argparse
+import datetime
+import glob
+import hashlib
+import json
+import os
+import sys
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+BATCH_PATH = os.path.abspath(__file__) # stamped too, since render_figure's drawing code lives here
+CHAMBERPLOT_PATH = os.path.join(os.path.dirname(BATCH_PATH), "chamberplot.py")
+TIME_FORMAT = "%m/%d/%Y %H:%M" # example: 3/10/2021 15:39
+COMPRESSED_EXTENSIONS = (".gz", ".xz", ".bz2") # the ones chamberplot.open_scan_file can read
+
+def expand_inputs(spec):
+    """
+    Returns the sorted list of input paths for a figure spec, with glob patterns expanded.
+    Like chamberplot.get_scan_paths, a compressed scan is skipped if it's there uncompressed too,
+    so scans that are being archived aren't read twice.
+    """
+    paths = []
+    for pattern in spec["inputs"]:
+        matches = set(glob.glob(pattern))
+        if not matches:
+            raise FileNotFoundError("No input files match {}".format(pattern))
+        paths.extend(sorted(
+            i for i in matches
+            if not (i.endswith(COMPRESSED_EXTENSIONS) and os.path.splitext(i)[0] in matches)
+        ))
+    if "inputs_slice" in spec:
+        paths = paths[slice(*spec["inputs_slice"])]
+        if not paths:
+            raise FileNotFoundError("No input files left after inputs_slice {}".format(spec["inputs_slice"]))
+    return paths
+
+def file_stamp(path):
+    """
+    Returns something that changes whenever the file at path does, without reading the file.
+    """
+    stat = os.stat(path)
+    return [path, stat.st_size, stat.st_mtime_ns]
+
+def fingerprint(spec, input_paths):
+    """
+    Hashes everything that a figure's outputs depend on, including the code that draws it.
+    """
+    stamps = {
+        "spec": spec,
+        "inputs": [file_stamp(path) for path in input_paths],
+        "chamberplot": file_stamp(CHAMBERPLOT_PATH),
+        "batch": file_stamp(BATCH_PATH)
+    }
+    return hashlib.sha256(json.dumps(stamps, sort_keys=True).encode()).hexdigest()
+
+def parse_x(value):
+    """
+    Converts an x value from the job file into what the plot uses for its x axis:
+    a number for normalized trends, or a datetime for everything else.
+    """
+    if isinstance(value, (int, float)):
+        return value
+    try:
+        return float(value)
+    except ValueError:
+        return datetime.datetime.strptime(value, TIME_FORMAT)
+
+def render_figure(spec, input_paths):
+    """
+    Draws one figure and saves it to each of its outputs. Runs in a worker process.
+    matplotlib is only imported here, so skipped jobs never pay for it.
+    """
+    import matplotlib
+    matplotlib.use("Agg") # no windows
+    import matplotlib.pyplot as plt
+    import chamberplot
+
+    x_labels = {parse_x(t): label for t, label in spec.get("x_labels", {}).items()}
+    common_kwargs = {"x_labels": x_labels}
+    for key in ("title", "pressure_floor"):
+        if key in spec:
+            common_kwargs[key] = spec[key]
+
+    if spec["function"] == "plot":
+        if len(input_paths) != 1:
+            raise ValueError("plot takes exactly one input, got {}".format(len(input_paths)))
+        fig = chamberplot.plot(
+            input_paths[0],
+            scan_index=spec.get("scan_index", 0),
+            **common_kwargs
+        )
+    elif spec["function"] == "plot_combined_trend":
+        fig = chamberplot.plot_combined_trend(
+            input_paths,
+            tuple(spec["masses"]),
+            plot_kwargs=spec.get("plot_kwargs", {}),
+            **common_kwargs
+        )
+    else:
+        raise ValueError("Unknown function {}".format(spec["function"]))
+
+    ax = fig.axes[0]
+    limits = spec.get("limits", {})
+    if "x" in limits:
+        left, right = limits["x"]
+        ax.set_xlim(left=parse_x(left), right=parse_x(right))
+    if "y" in limits:
+        bottom, top = limits["y"]
+        ax.set_ylim(bottom=bottom, top=top)
+    if "size" in spec:
+        fig.set_size_inches(*spec["size"])
+    if "subplots_adjust" in spec:
+        fig.subplots_adjust(**spec["subplots_adjust"])
+
+    for output_path in spec["outputs"]:
+        if os.path.dirname(output_path):
+            os.makedirs(os.path.dirname(output_path), exist_ok=True)
+        fig.savefig(output_path, dpi=spec.get("dpi", 256))
+    plt.close(fig)
+    return spec["name"]
+
+def load_cache(cache_path):
+    try:
+        with open(cache_path) as file:
+            return json.load(file)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+def run_jobs(job_path, jobs=None, force=False, only=None):
+    """
+    Renders every figure in the job file at job_path that is out of date.
+    jobs is the number of worker processes (defaults to one per CPU).
+    only optionally restricts rendering to an iterable of figure names.
+    Returns the number of figures that failed.
+    """
+    with open(job_path) as file:
+        specs = json.load(file)["figures"]
+    cache_path = os.path.join(os.path.dirname(os.path.abspath(job_path)), ".chamberplot_batch_cache.json")
+    cache = load_cache(cache_path)
+
+    pending = {} # name: (spec, input_paths, fingerprint)
+    failures = 0
+    for spec in specs:
+        name = spec["name"]
+        if only and name not in only:
+            continue
+        try:
+            input_paths = expand_inputs(spec)
+        except FileNotFoundError as error:
+            print("{}: {}".format(name, error))
+            failures += 1
+            continue
+        digest = fingerprint(spec, input_paths)
+        outputs_exist = all(os.path.exists(path) for path in spec["outputs"])
+        if not force and outputs_exist and cache.get(name) == digest:
+            print("{}: up to date".format(name))
+            continue
+        pending[name] = (spec, input_paths, digest)
+
+    if pending:
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            futures = {
+                executor.submit(render_figure, spec, input_paths): name
+                for name, (spec, input_paths, digest) in pending.items()
+            }
+            for future in as_completed(futures):
+                name = futures[future]
+                try:
+                    future.result()
+                except Exception as error:
+                    # The worker's traceback comes along as the error's cause, so this shows where it really failed.
+                    print("{}: failed:\n{}".format(name, "".join(traceback.format_exception(type(error), error, error.__traceback__))))
+                    cache.pop(name, None)
+                    failures += 1
+                    continue
+                print("{}: rendered".format(name))
+                cache[name] = pending[name][2]
+
+        with open(cache_path, "w") as file:
+            json.dump(cache, file, indent=4)
+
+    return failures
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render chamberplot figures from a job file.")
+    parser.add_argument("job_file", help="JSON file listing figures to render")
+    parser.add_argument("figures", nargs="*", help="only render figures with these names")
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="number of worker processes (default: one per CPU)")
+    parser.add_argument("-f", "--force", action="store_true", help="re-render figures even if they're up to date")
+    args = parser.parse_args(argv)
+    return 1 if run_jobs(args.job_file, args.jobs, args.force, set(args.figures)) else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,274 @@
+"""
+Serves a live dashboard of RGA data to web browsers, so more than one person can watch.
+
+Usage: python chamberplot_server.py [--host 127.0.0.1] [--port 8000]
+Then open http://127.0.0.1:8000 in a browser.
+
+The server reads the instruments from chamberplot_stream_config.json and ingests each one's scans once,
+using the same scan_stream as chamberplot_stream.py. New data points are encoded once and pushed
+to every viewer as JSON over server-sent events (/events), so adding viewers doesn't add ingestion work.
+The dashboard can also change the config, just like chamberplot_stream_config.py.
+"""
+
+import argparse
+import json
+import math
+import os
+import queue
+import threading
+import time
+import traceback
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+from chamberplot_stream import load_config, save_config, instrument_settings, load_instruments, mass_label
+
+DASHBOARD_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "chamberplot_dashboard.html")
+POLL_INTERVAL = 1 # seconds between checking for new data, like chamberplot_stream.py's frame interval
+
+config_lock = threading.Lock() # one config change at a time, so concurrent changes don't overwrite each other
+
+def is_number(value):
+    """
+    Checks for a finite number. JSON can smuggle in infinities (1e999, Infinity) and NaN,
+    which would crash the plotters and can't be sent on to browsers.
+    """
+    return isinstance(value, (int, float)) and not isinstance(value, bool) and math.isfinite(value)
+
+MAX_ONION_SWEEPS = 100 # each sweep in a plotter's SweepRing takes SWEEP_CAPACITY points of memory
+MAX_WATERFALL = 10 # decades between sweeps; more than this just pushes them off the plot
+
+# Settings the dashboard may change: name: (check, description for error messages)
+CONFIG_CHECKS = {
+    "interesting_masses": (
+        lambda value: isinstance(value, list) and value and all(is_number(m) for m in value),
+        "a non-empty list of numbers"
+    ),
+    "onion_opacity": (lambda value: is_number(value) and 0 <= value <= 1, "a number from 0 to 1"),
+    "pressure_floor": (lambda value: is_number(value) and value > 0, "a positive number"),
+    "onion_sweeps": (
+        lambda value: isinstance(value, int) and not isinstance(value, bool) and 0 <= value <= MAX_ONION_SWEEPS,
+        "a whole number from 0 to {}".format(MAX_ONION_SWEEPS)
+    ),
+    "waterfall": (lambda value: is_number(value) and 0 <= value <= MAX_WATERFALL, "a number from 0 to {}".format(MAX_WATERFALL))
+}
+
+def encode_event(event, data):
+    """
+    Encodes a server-sent event. Done once per event, no matter how many viewers there are.
+    """
+    return "event: {}\ndata: {}\n\n".format(event, json.dumps(data, separators=(",", ":"))).encode()
+
+def update_config(changes, instrument=None):
+    """
+    Applies a dictionary of settings to the config file and bumps its nonce, so every plotter notices.
+    Changes apply to the instrument called instrument, or to all of them if it's None.
+    Raises ValueError without changing anything if any of the changes aren't allowed.
+    """
+    if not isinstance(changes, dict):
+        raise ValueError("changes should be a dictionary of settings")
+    for key, value in changes.items():
+        if key not in CONFIG_CHECKS:
+            raise ValueError("Can't change {}".format(key))
+        check, description = CONFIG_CHECKS[key]
+        if not check(value):
+            raise ValueError("{} should be {}".format(key, description))
+
+    with config_lock:
+        config = load_config()
+        if instrument is not None and instrument not in config.get("instruments", {}):
+            raise ValueError("Unknown instrument {}".format(instrument))
+        target = config if instrument is None else config["instruments"][instrument]
+        target.update(changes)
+        if "interesting_masses" in target:
+            target["interesting_masses"].sort()
+        config["nonce"] += 1
+        save_config(config)
+
+class Broadcaster:
+    """
+    Ingests every instrument in a background thread and fans the resulting events out to the viewers.
+    Each viewer gets a queue of already-encoded events.
+    """
+
+    def __init__(self):
+        config = load_config()
+        self.instruments = load_instruments(config)
+        self.config = config
+        self.settings = {instrument.name: instrument_settings(config, instrument.name) for instrument in self.instruments}
+        self.lock = threading.Lock() # guards the instruments' buffers, self.settings and self.clients
+        self.clients = []
+
+    def trend_history(self, instrument, masses):
+        """
+        Returns the whole trend of each of masses that instrument has data for, as {mass: [times, pressures]}.
+        """
+        return {
+            str(m): [[t.timestamp() for t in instrument.mass_series[m][0]], instrument.mass_series[m][1]]
+            for m in masses if m in instrument.mass_series
+        }
+
+    def snapshot(self):
+        """
+        Returns the encoded events that bring a new viewer up to date:
+        the config, and for each instrument, the latest sweep and the trends of its interesting masses.
+        Only sent when a viewer connects; after that, viewers just get what's new.
+        """
+        events = [encode_event("config", self.config_event())]
+        for instrument in self.instruments:
+            events.append(encode_event("snapshot", {
+                "instrument": instrument.name,
+                "sweep": [list(i) for i in zip(*sorted(instrument.sweep_pressures.items()))] or [[], []],
+                "trend": self.trend_history(instrument, self.settings[instrument.name]["interesting_masses"])
+            }))
+        return events
+
+    def config_event(self):
+        """
+        Returns the settings viewers need: the top-level ones, which "all instruments" edits,
+        and each instrument's own. Nothing else from the config (like scans_dir paths) is sent.
+        """
+        def public(settings):
+            return {key: settings[key] for key in CONFIG_CHECKS if key in settings}
+
+        return {
+            "defaults": public(self.config),
+            "instruments": {
+                name: dict(public(settings), labels={str(m): mass_label(m) for m in settings["interesting_masses"]})
+                for name, settings in self.settings.items()
+            }
+        }
+
+    def subscribe(self):
+        client = queue.Queue()
+        with self.lock:
+            for event in self.snapshot():
+                client.put(event)
+            self.clients.append(client)
+        return client
+
+    def unsubscribe(self, client):
+        with self.lock:
+            self.clients.remove(client)
+
+    def broadcast(self, events):
+        for client in self.clients:
+            for event in events:
+                client.put(event)
+
+    def poll(self):
+        """
+        Ingests new data from every instrument and checks the config, then broadcasts what changed.
+        """
+        events = []
+        with self.lock:
+            for instrument in self.instruments:
+                # Remember where each mass's series ended, so only the new points get sent.
+                lengths = {m: len(times) for m, (times, pressures) in instrument.mass_series.items()}
+                if not instrument.ingest():
+                    continue
+                times, masses, pressures = [], [], []
+                for m, (series_times, series_pressures) in instrument.mass_series.items():
+                    start = lengths.get(m, 0)
+                    times.extend(t.timestamp() for t in series_times[start:])
+                    masses.extend([m] * (len(series_times) - start))
+                    pressures.extend(series_pressures[start:])
+                order = sorted(range(len(times)), key=times.__getitem__) # in the order the RGA measured them
+                events.append(encode_event("points", {
+                    "instrument": instrument.name,
+                    "t": [times[i] for i in order],
+                    "m": [masses[i] for i in order],
+                    "p": [pressures[i] for i in order]
+                }))
+            self.broadcast(events) # before reading the config, so these points go out even if that fails
+            events = []
+
+            config = load_config()
+            if config["nonce"] != self.config["nonce"]:
+                old_settings = self.settings
+                self.config = config
+                self.settings = {instrument.name: instrument_settings(config, instrument.name) for instrument in self.instruments}
+                events.append(encode_event("config", self.config_event()))
+                # Viewers already have the trends of masses that were interesting before, so only send the new ones.
+                for instrument in self.instruments:
+                    new_masses = set(self.settings[instrument.name]["interesting_masses"]) - set(old_settings[instrument.name]["interesting_masses"])
+                    history = self.trend_history(instrument, new_masses)
+                    if history:
+                        events.append(encode_event("history", {"instrument": instrument.name, "trend": history}))
+            self.broadcast(events)
+
+    def run(self):
+        while True:
+            try:
+                self.poll()
+            except Exception: # e.g. a config file with a typo in it. Keep going, so the dashboard doesn't freeze.
+                traceback.print_exc()
+            time.sleep(POLL_INTERVAL)
+
+def make_handler(broadcaster):
+    class DashboardHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path == "/":
+                with open(DASHBOARD_PATH, "rb") as file:
+                    self.respond(200, "text/html", file.read())
+            elif self.path == "/events":
+                self.stream_events()
+            else:
+                self.respond(404, "text/plain", b"not found")
+
+        def do_POST(self):
+            if self.path != "/config":
+                self.respond(404, "text/plain", b"not found")
+                return
+            try:
+                request = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                update_config(request["changes"], request.get("instrument"))
+            except (AttributeError, KeyError, TypeError, ValueError) as error:
+                self.respond(400, "text/plain", str(error).encode())
+                return
+            self.respond(200, "text/plain", b"ok")
+
+        def respond(self, status, content_type, body):
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def stream_events(self):
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Cache-Control", "no-cache")
+            self.end_headers()
+            client = broadcaster.subscribe()
+            try:
+                while True:
+                    try:
+                        self.wfile.write(client.get(timeout=15))
+                    except queue.Empty:
+                        self.wfile.write(b": keepalive\n\n") # notices closed connections
+                    self.wfile.flush()
+            except (BrokenPipeError, ConnectionResetError):
+                pass # the viewer left
+            finally:
+                broadcaster.unsubscribe(client)
+
+        def log_message(self, format, *args):
+            pass # don't print every request
+
+    return DashboardHandler
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve a live RGA dashboard to web browsers.")
+    parser.add_argument("--host", default="127.0.0.1", help="address to listen on (default: 127.0.0.1, this computer only)")
+    parser.add_argument("--port", type=int, default=8000, help="port to listen on (default: 8000)")
+    args = parser.parse_args(argv)
+
+    broadcaster = Broadcaster()
+    threading.Thread(target=broadcaster.run, daemon=True).start()
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(broadcaster))
+    server.daemon_threads = True
+    print("Serving the dashboard at http://{}:{}".format(args.host, args.port))
+    server.serve_forever()
+
+if __name__ == "__main__":
+    main()
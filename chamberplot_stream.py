@@ -1,13 +1,18 @@
 """
 Plots RGA data as it's generated.
+Can watch several RGAs from one process; list them under "instruments" in chamberplot_stream_config.json.
 """
 
 import datetime, time
 import matplotlib
 import matplotlib.pyplot as plt
 from matplotlib.animation import FuncAnimation
+from matplotlib.collections import LineCollection
+import numpy as np
 import os
 import json
+import shutil
+import tempfile
 
 MASS_GUESSES = { # Used in legend labels.
     2: "$H_2$",
@@ -22,29 +27,37 @@ MASS_GUESSES = { # Used in legend labels.
     178: "C_8H_18S_2"
 }
 
-SCANS_DIR = "spoofed_rga_data" # Change to the directory that the RGA saves files into.
+SCANS_DIR = "spoofed_rga_data" # Directory to watch if the config doesn't list any instruments.
+COMPRESSED_EXTENSIONS = (".gz", ".xz", ".bz2") # Archived scans. Never live, so the stream ignores them.
+CONFIG_PATH = "chamberplot_stream_config.json"
+LAYOUTS = ("side_by_side", "switch")
+ONION_SWEEPS = 10 # Default number of old sweeps to onionskin.
+SWEEP_CAPACITY = 2048 # Most points a sweep can have. Extra points are left out of the sweep view.
 
-def get_scan_paths():
-    return [SCANS_DIR + "/" + i for i in os.listdir(SCANS_DIR) if i.startswith("MassSpecData")]
+def get_scan_paths(scans_dir=SCANS_DIR):
+    return [
+        scans_dir + "/" + i for i in os.listdir(scans_dir)
+        if i.startswith("MassSpecData") and not i.endswith(COMPRESSED_EXTENSIONS)
+    ]
 
-def scan_stream(): # todo: replace live_scan_path with a scan path index to tidy this up
+def scan_stream(scans_dir=SCANS_DIR): # todo: replace live_scan_path with a scan path index to tidy this up
     """
-    Yields lines of scan filess as they are generated by the RGA,
+    Yields lines of scan filess in scans_dir as they are generated by the RGA,
     from both the XML and CSV sections.
     Yields None when there are not yet more lines to yield.
     """
-    scan_paths = get_scan_paths()
+    scan_paths = get_scan_paths(scans_dir)
     while not scan_paths:
         yield None # signals "check again later"
-        scan_paths = get_scan_paths()
-        
+        scan_paths = get_scan_paths(scans_dir)
+
     scan_paths.sort() # sorted chronologically due to how the RGA generates filenames
     live_scan_path = scan_paths[-1] # scan_paths[-1] is the most recent scan path
     file = open(scan_paths[-1])
     while True:
-        
-        scan_paths = get_scan_paths()
-        
+
+        scan_paths = get_scan_paths(scans_dir)
+
         while True: # yield all new lines in the current file
             cursor = file.tell()
             line = file.readline()
@@ -53,15 +66,35 @@ def scan_stream(): # todo: replace live_scan_path with a scan path index to tidy
             else: # no more lines, or line not done being written yet
                 file.seek(cursor)
                 break
-        
+
         scan_paths.sort()
         if live_scan_path != scan_paths[-1]: # current scan is no longer the most recent
             file.close()
-            live_scan_path = scan_paths[scan_paths.index(live_scan_path) + 1] # this code is clunky sorry >.<"
+            # Move on to the next scan. (The finished one might have been archived already, so don't look for it.)
+            live_scan_path = min(i for i in scan_paths if i > live_scan_path)
             file = open(live_scan_path)
         else: # we're waiting for new data
             yield None # "check again later"
 
+def parse_line(line):
+    """
+    Parses a line from scan_stream into a tuple of (time, mass, pressure).
+    Returns None if the line isn't a data point, like the lines in the XML section.
+    """
+    if not line.startswith("2"): # csv lines start with the year. This kludge will only work until the year 3000.
+        return None
+    raw_t, raw_m, raw_p = [i.strip() for i in line[:-2].split(", ")]
+
+    m = float(raw_m)
+    if m == int(m):
+        m = int(m)
+
+    t = datetime.datetime.strptime(raw_t, "%Y/%m/%d %H:%M:%S.%f")
+
+    p = float(raw_p)
+
+    return t, m, p
+
 def generate_palette(masses):
     """
     Generates a color palette for an iterable of masses.
@@ -87,179 +120,372 @@ def mass_label(m):
     else:
         return str(m)
 
-## Set up figure.
-fig, (trend_ax, sweep_ax) = plt.subplots(2, 1)
-fig.suptitle("Live Residual Gas Analysis", size=20, weight="bold")
-fig.canvas.set_window_title("Live Residual Gas Analysis")
-fig.subplots_adjust(hspace=0.4) # Adjust margin between subplots.
-
-## Set up trend subplot.
-trend_ax.set_title("Trend View")
-trend_ax.set_xlabel("time")
-trend_ax.set_yscale("log")
-trend_ax.set_ylabel("relative pressure (Pa)") # assuming that the rga is set to Pa
-trend_ax.yaxis.grid(True) # Add horizontal gridlines because Dr. Howald likes them.
-trend_artists = []
-mass_series = {}
-
-## Set up sweep subplot.
-sweep_ax.set_title("Sweep View")
-sweep_ax.set_xlabel("mass (amu)")
-sweep_ax.set_ylabel("relative pressure (Pa)") # assuming that the rga is set to Pa
-sweep_ax.yaxis.grid(True) # Add horizontal gridlines because Dr. Howald likes them.
-#sweep_ax.xaxis.grid(True) # Uncomment this to add vertical gridlines if you want.
-sweep_ax.xaxis.set_major_locator(plt.MultipleLocator(10)) # major ticks every 10 amu
-sweep_ax.xaxis.set_minor_locator(plt.MultipleLocator(1)) # minor ticks every 1 amu
-sweep_ax.set_yscale("log")
-sweep_pressures = {} # mass: pressure
-
-streamer = scan_stream()
-
-def animate():
+def load_config():
+    with open(CONFIG_PATH) as file:
+        return json.load(file)
+
+def save_config(config):
     """
-    A generator, iterated upon by FuncAnimation to animate the plot.
-    Implementation note: yielding allows FuncAnimation to re-render the plot display.
+    Writes config to CONFIG_PATH all at once, by writing a temporary file and swapping it in,
+    so plotters reading the config every frame never see it half-written.
     """
-    last_mass = None
-    current_sweep_artist = None
-    config_nonce = None
-    legend = fig.legend(handles=[])
-    while True:
-        for line in streamer:
+    directory = os.path.dirname(os.path.abspath(CONFIG_PATH))
+    with tempfile.NamedTemporaryFile("w", dir=directory, suffix=".tmp", delete=False) as file:
+        json.dump(config, file, indent=4)
+    if os.path.exists(CONFIG_PATH):
+        shutil.copymode(CONFIG_PATH, file.name) # temporary files are private, but the config shouldn't become private
+    os.replace(file.name, CONFIG_PATH)
+
+def instrument_settings(config, name):
+    """
+    Returns the settings for the instrument called name:
+    the top-level settings in config, overridden by anything in that instrument's entry under "instruments".
+    """
+    settings = {key: value for key, value in config.items() if key != "instruments"}
+    settings.update(config.get("instruments", {}).get(name, {}))
+    settings["interesting_masses"] = sorted(settings["interesting_masses"])
+    return settings
+
+class SweepRing:
+    """
+    The sweep in progress plus the last n_sweeps finished sweeps, in fixed-size arrays.
+    Each sweep is a row of (mass, pressure) points, and finishing a sweep just moves on to the next row,
+    so keeping and drawing the sweeps costs the same no matter how many sweeps have gone by.
+    """
+
+    def __init__(self, n_sweeps=ONION_SWEEPS, capacity=SWEEP_CAPACITY):
+        self.n_sweeps = n_sweeps
+        self.points = np.full((n_sweeps + 1, capacity, 2), np.nan)
+        self.lengths = np.zeros(n_sweeps + 1, dtype=int)
+        self.current = 0 # row of the sweep in progress
+        self.finished = 0 # number of finished sweeps stored, up to n_sweeps
+
+    def append(self, m, p):
+        length = self.lengths[self.current]
+        if length < self.points.shape[1]:
+            self.points[self.current, length] = m, p
+            self.lengths[self.current] = length + 1
+
+    def finish_sweep(self):
+        self.current = (self.current + 1) % len(self.lengths)
+        self.lengths[self.current] = 0 # start overwriting the oldest sweep
+        self.finished = min(self.finished + 1, self.n_sweeps)
+
+    def current_sweep(self):
+        return self.points[self.current, :self.lengths[self.current]]
+
+    def old_sweeps(self):
+        """
+        Returns the finished sweeps, newest first, as views into the ring.
+        """
+        rows = [(self.current - age) % len(self.lengths) for age in range(1, self.finished + 1)]
+        return [self.points[row, :self.lengths[row]] for row in rows]
+
+    def resized(self, n_sweeps):
+        """
+        Returns a SweepRing holding n_sweeps old sweeps, with as much of this one's data as fits.
+        """
+        ring = SweepRing(n_sweeps, self.points.shape[1])
+        for sweep in self.old_sweeps()[:n_sweeps][::-1]:
+            ring.points[ring.current, :len(sweep)] = sweep
+            ring.lengths[ring.current] = len(sweep)
+            ring.finish_sweep()
+        current_sweep = self.current_sweep()
+        ring.points[ring.current, :len(current_sweep)] = current_sweep
+        ring.lengths[ring.current] = len(current_sweep)
+        return ring
+
+class Instrument:
+    """
+    The data buffers and subplots for one RGA.
+    Each instrument streams its own scans directory, but they're all ingested and drawn by the same process.
+    """
+
+    def __init__(self, name, scans_dir):
+        self.name = name
+        self.scans_dir = scans_dir
+        self.streamer = scan_stream(scans_dir)
+
+        self.mass_series = {} # mass: (times, pressures)
+        self.sweep_pressures = {} # mass: pressure, from the latest reading of each mass
+        self.sweeps = SweepRing()
+        self.last_mass = None
+        self.sweep_finished = False # whether a sweep has finished since the last draw, so the onionskin needs updating
+
+        self.settings = None
+        self.palette = None
+        self.stale = True # needs to be redrawn even if no new data arrives
+
+        self.trend_ax = None
+        self.sweep_ax = None
+        self.legend = None
+        self.trend_artists = []
+        self.onion_artist = None
+        self.current_sweep_artist = None
+        self.marker_artist = None
+        self.position_artist = None
+
+    def ingest(self):
+        """
+        Consumes every fresh line from this instrument's scan stream into its buffers.
+        Returns True if any new data points arrived.
+        """
+        fresh = False
+        for line in self.streamer:
             if line is None: # No more fresh lines to consume.
                 break
-            if line.startswith("2"): # It's a csv line, so it has data in it. This kludge will only work until the year 3000.
-                #print(line)
-                raw_t, raw_m, raw_p = [i.strip() for i in line[:-2].split(", ")]
-                
-                m = float(raw_m)
-                if m == int(m):
-                    m = int(m)
-                
-                t = datetime.datetime.strptime(raw_t, "%Y/%m/%d %H:%M:%S.%f")
-                   
-                p = float(raw_p)
-
-                # Add new data to trend.
-                if m not in mass_series:
-                    mass_series[m] = [t], [p]
-                else:
-                    mass_series[m][0].append(t)
-                    mass_series[m][1].append(p)
-
-                # Update data in sweep.
-                if m != 999: # Don't include the total pressure reading in the sweep.
-                    sweep_pressures[m] = p
-                
-                if last_mass and m < last_mass and current_sweep_artist: # We've gone backwards, so onionskin the old data.
-                    current_sweep_artist.set_color("Orchid") # Change color to distinguish from newest data.
-                    current_sweep_artist = None # Don't bother trying to remove the artist later.
-                    for artist in sweep_ax.lines:
-                        alpha = artist.get_alpha() or 1 # alpha is None by default, in which case use 1 instead
-                        if alpha < 0.1:
-                            artist.remove() # artist is vanishingly transparent, so just remove it.
-                        else:
-                            artist.set_alpha(alpha * onion_opacity) # Onionskin old data.
-
-                last_mass = m
+            row = parse_line(line)
+            if row is None:
+                continue
+            t, m, p = row
+            fresh = True
 
-        # Check configuration file. (Not very efficient, but we have to read files every frame anyway.)
-        with open("chamberplot_stream_config.json") as file:
-            config = json.load(file)
+            # Add new data to trend.
+            if m not in self.mass_series:
+                self.mass_series[m] = [t], [p]
+            else:
+                self.mass_series[m][0].append(t)
+                self.mass_series[m][1].append(p)
 
-        if config_nonce != config["nonce"]:
-            print("Updating configuration.")
-            config_nonce = config["nonce"]
-            interesting_masses = config["interesting_masses"]
-            interesting_masses.sort()
-            onion_opacity = config["onion_opacity"]
-            pressure_floor = config["pressure_floor"]
-
-            # Regenerate palette
-            palette = generate_palette(interesting_masses)
-
-            # Update legend
-            legend.remove()
-            legend = fig.legend(
-                handles=[
-                    matplotlib.patches.Patch(
-                        color=palette[mass],
-                        label=mass_label(mass)
-                    ) for mass in interesting_masses
-                ]
-            )
-
-            # Adjust lower y limit to pressure_floor.
-            # Currently adjusts both subplots to use the same pressure floor.
-            # This could be extended to use different pressure floors for the two subplots.
-            for ax in trend_ax, sweep_ax:
-                ax.set_ylim(auto=True) # let matplotlib decide the top y limit
-                ax.set_ylim(bottom=pressure_floor)
-
-        
-        #### Update sweep subplot
+            if self.last_mass and m < self.last_mass: # We've gone backwards, so a new sweep has started.
+                self.sweeps.finish_sweep()
+                self.sweep_finished = True
+
+            # Update data in sweep.
+            if m != 999: # Don't include the total pressure reading in the sweep.
+                self.sweep_pressures[m] = p
+                self.sweeps.append(m, p)
+
+            self.last_mass = m
+        return fresh
+
+    def setup_axes(self, trend_ax, sweep_ax, show_name=False):
+        """
+        Sets up the trend and sweep subplots that this instrument draws on.
+        show_name puts the instrument's name in the subplot titles, for when there are several instruments.
+        """
+        self.trend_ax = trend_ax
+        self.sweep_ax = sweep_ax
+        prefix = self.name + ": " if show_name else ""
+
+        ## Set up trend subplot.
+        trend_ax.set_title(prefix + "Trend View")
+        trend_ax.set_xlabel("time")
+        trend_ax.set_yscale("log")
+        trend_ax.set_ylabel("relative pressure (Pa)") # assuming that the rga is set to Pa
+        trend_ax.yaxis.grid(True) # Add horizontal gridlines because Dr. Howald likes them.
+
+        ## Set up sweep subplot.
+        sweep_ax.set_title(prefix + "Sweep View")
+        sweep_ax.set_xlabel("mass (amu)")
+        sweep_ax.set_ylabel("relative pressure (Pa)") # assuming that the rga is set to Pa
+        sweep_ax.yaxis.grid(True) # Add horizontal gridlines because Dr. Howald likes them.
+        #sweep_ax.xaxis.grid(True) # Uncomment this to add vertical gridlines if you want.
+        sweep_ax.xaxis.set_major_locator(plt.MultipleLocator(10)) # major ticks every 10 amu
+        sweep_ax.xaxis.set_minor_locator(plt.MultipleLocator(1)) # minor ticks every 1 amu
+        sweep_ax.set_yscale("log")
+
+        # Make the sweep view's artists once. Drawing just updates their data.
+        self.onion_artist = LineCollection([], color="Orchid")
+        sweep_ax.add_collection(self.onion_artist)
+        (self.current_sweep_artist, ) = sweep_ax.plot([], [], color="DarkOrchid")
+        self.marker_artist = sweep_ax.scatter([], [], marker=matplotlib.markers.CARETDOWN, s=12 ** 2, zorder=3)
+        (self.position_artist, ) = sweep_ax.plot([], [], marker="*", markersize=12, linestyle="", color="Indigo", zorder=3)
+
+    def set_visible(self, visible):
+        self.trend_ax.set_visible(visible)
+        self.sweep_ax.set_visible(visible)
+        if visible:
+            self.stale = True
+
+    def configure(self, settings):
+        """
+        Applies this instrument's settings from the config file.
+        """
+        self.settings = settings
+        interesting_masses = settings["interesting_masses"]
 
-        if current_sweep_artist is not None: # if we didn't just onionskin the current sweep artist,
-            current_sweep_artist.remove() # then remove it from the plot so we can replace it with a new one.
-        
-        (current_sweep_artist, ) = sweep_ax.plot(
-            sweep_pressures.keys(),
-            sweep_pressures.values(),
-            color="DarkOrchid"
+        onion_sweeps = settings.get("onion_sweeps", ONION_SWEEPS)
+        if onion_sweeps != self.sweeps.n_sweeps:
+            self.sweeps = self.sweeps.resized(onion_sweeps)
+
+        # Regenerate palette
+        self.palette = generate_palette(interesting_masses)
+
+        # Update legend
+        if self.legend is not None:
+            self.legend.remove()
+        self.legend = self.trend_ax.legend(
+            handles=[
+                matplotlib.patches.Patch(
+                    color=self.palette[mass],
+                    label=mass_label(mass)
+                ) for mass in interesting_masses
+            ],
+            loc="upper left",
+            fontsize="small"
         )
 
-        # Remove all markers.
-        for artist in sweep_ax.lines:
-            if artist.get_marker() != "None":
-                artist.remove()
-        
-        # Mark interesting masses on the sweep subplot.
-        for m in interesting_masses:
-            if m not in sweep_pressures: # No sweep data for this mass, so skip it.
-                continue
-            
-            sweep_ax.plot(
-                [m],
-                [sweep_pressures[m]],
-                marker=matplotlib.markers.CARETDOWN,
-                markersize=12,
-                color=palette[m] # Use the same color as the trend does for this mass.
-            )
-        
+        # Adjust lower y limit to pressure_floor.
+        # Currently adjusts both subplots to use the same pressure floor.
+        # This could be extended to use different pressure floors for the two subplots.
+        for ax in self.trend_ax, self.sweep_ax:
+            ax.set_ylim(auto=True) # let matplotlib decide the top y limit
+            ax.set_ylim(bottom=settings["pressure_floor"])
+
+        self.stale = True
+
+    def draw(self):
+        """
+        Redraws this instrument's subplots from its buffers.
+        """
+        sweep_ax, trend_ax = self.sweep_ax, self.trend_ax
+        interesting_masses = self.settings["interesting_masses"]
+        palette = self.palette
+
+        #### Update sweep subplot
+
+        if self.sweep_finished or self.stale: # Onionskin the old sweeps.
+            old_sweeps = self.sweeps.old_sweeps()
+            opacity = self.settings["onion_opacity"]
+            waterfall = self.settings.get("waterfall", 0) # decades to shift each older sweep down by
+            if waterfall:
+                old_sweeps = [sweep * (1, 10 ** (-waterfall * (age + 1))) for age, sweep in enumerate(old_sweeps)]
+            colors = matplotlib.colors.to_rgba_array(["Orchid"] * len(old_sweeps))
+            colors[:, 3] = opacity ** np.arange(1, len(old_sweeps) + 1) # older sweeps fade away
+            self.onion_artist.set_segments(old_sweeps)
+            self.onion_artist.set_color(colors)
+            self.sweep_finished = False
+
+        current_sweep = self.sweeps.current_sweep()
+        self.current_sweep_artist.set_data(current_sweep[:, 0], current_sweep[:, 1])
+
+        # Mark interesting masses on the sweep subplot, using the same colors as the trend does.
+        marked_masses = [m for m in interesting_masses if m in self.sweep_pressures]
+        self.marker_artist.set_offsets([(m, self.sweep_pressures[m]) for m in marked_masses] or np.empty((0, 2)))
+        self.marker_artist.set_color([palette[m] for m in marked_masses])
+
         # Mark the current sweep position on the sweep subplot so it's easier to follow with the eye.
-        if last_mass is not None:
-            sweep_ax.plot(
-                [last_mass],
-                [sweep_pressures[last_mass]],
-                marker="*",
-                markersize=12,
-                color="Indigo"
-            )
-
-        
+        if self.last_mass in self.sweep_pressures:
+            self.position_artist.set_data([self.last_mass], [self.sweep_pressures[self.last_mass]])
+
+        sweep_ax.relim() # let the x axis follow the sweep
+        sweep_ax.autoscale_view()
+
+
         #### Update trend subplot
 
-        for artist in trend_artists:
+        for artist in self.trend_artists:
             artist.remove()
-        trend_artists.clear()
-        
+        self.trend_artists.clear()
+
         for m in interesting_masses:
-            if m not in mass_series:
+            if m not in self.mass_series:
                 continue # No data yet for this mass, so don't bother trying to plot it.
-            
-            times, pressures = mass_series[m]
-            trend_artists.append(*trend_ax.plot(
+
+            times, pressures = self.mass_series[m]
+            self.trend_artists.append(*trend_ax.plot(
                 times,
                 pressures,
                 color=palette.get(m)
             ))
-        
+
+        self.stale = False
+
+def load_instruments(config):
+    """
+    Makes an Instrument for each entry under "instruments" in config,
+    or a single one watching SCANS_DIR if there aren't any.
+    """
+    entries = config.get("instruments") or {"RGA": {"scans_dir": SCANS_DIR}}
+    return [Instrument(name, entry.get("scans_dir", SCANS_DIR)) for name, entry in entries.items()]
+
+def ingest(instruments):
+    """
+    The shared watcher: pulls fresh data for every instrument, whether or not it's on screen.
+    Returns the list of instruments that got new data.
+    """
+    return [instrument for instrument in instruments if instrument.ingest()]
+
+class View:
+    """
+    Lays out the instruments' subplots and keeps track of which ones are on screen.
+    "side_by_side" gives each instrument its own column.
+    "switch" shows one instrument at a time; press its number key, or n for the next one.
+    """
+
+    def __init__(self, instruments, layout="side_by_side"):
+        if layout not in LAYOUTS:
+            raise ValueError("layout should be one of {}, not {}".format(LAYOUTS, layout))
+        self.instruments = instruments
+        self.layout = layout
+        self.current = 0 # index of the instrument shown in "switch" layout
+        show_name = len(instruments) > 1
+
+        if layout == "side_by_side":
+            self.fig, axes = plt.subplots(2, len(instruments), squeeze=False)
+            for i, instrument in enumerate(instruments):
+                instrument.setup_axes(axes[0][i], axes[1][i], show_name)
+        else:
+            self.fig = plt.figure()
+            grid = self.fig.add_gridspec(2, 1)
+            for i, instrument in enumerate(instruments): # stack every instrument's subplots in the same place
+                instrument.setup_axes(self.fig.add_subplot(grid[0]), self.fig.add_subplot(grid[1]), show_name)
+                instrument.set_visible(i == self.current)
+            self.fig.canvas.mpl_connect("key_press_event", self.on_key)
+
+        self.fig.suptitle("Live Residual Gas Analysis", size=20, weight="bold")
+        self.fig.canvas.manager.set_window_title("Live Residual Gas Analysis")
+        self.fig.subplots_adjust(hspace=0.4) # Adjust margin between subplots.
+
+    def on_key(self, event):
+        if event.key == "n":
+            self.show((self.current + 1) % len(self.instruments))
+        elif event.key and event.key.isdigit() and 0 < int(event.key) <= len(self.instruments):
+            self.show(int(event.key) - 1)
+
+    def show(self, index):
+        self.instruments[self.current].set_visible(False)
+        self.current = index
+        self.instruments[index].set_visible(True)
+
+    def visible(self):
+        if self.layout == "side_by_side":
+            return self.instruments
+        return [self.instruments[self.current]]
+
+def animate(view):
+    """
+    A generator, iterated upon by FuncAnimation to animate the plot.
+    Implementation note: yielding allows FuncAnimation to re-render the plot display.
+    """
+    config_nonce = None
+    while True:
+        fresh = ingest(view.instruments)
+
+        # Check configuration file. (Not very efficient, but we have to read files every frame anyway.)
+        config = load_config()
+
+        if config_nonce != config["nonce"]:
+            print("Updating configuration.")
+            config_nonce = config["nonce"]
+            for instrument in view.instruments:
+                instrument.configure(instrument_settings(config, instrument.name))
+
+        # Only redraw instruments that are on screen and have something new to show.
+        for instrument in view.visible():
+            if instrument.stale or instrument in fresh:
+                instrument.draw()
+
         # Let FuncAnimation update the display.
         yield
-    
-
-animator = animate()
-ani = FuncAnimation(fig, lambda x: next(animator), 1000)
-plt.show()
 
+def main():
+    config = load_config()
+    view = View(load_instruments(config), config.get("layout", "side_by_side"))
+    animator = animate(view)
+    ani = FuncAnimation(view.fig, lambda x: next(animator), 1000)
+    plt.show()
 
+if __name__ == "__main__":
+    main()
@@ -1,38 +1,61 @@
 # configures the stream plotter as it's running.
+# "use <instrument>" makes later commands only affect that instrument; "use all" goes back to affecting all of them.
 # sloppy and error-prone, sorry.
 
 import time
 import json
 from pprint import pprint
 
+from chamberplot_stream import save_config
+
 def to_number(s):
     m = float(s)
     if float(m) == int(m):
         m = int(m)
     return m
 
+instrument = None # name of the instrument to configure, or None to configure all of them
+
 while True: 
     command, param = input("enter command: ").split(" ", maxsplit=1)
     with open("chamberplot_stream_config.json") as file:
         config = json.load(file)
+    if command == "use":
+        if param == "all":
+            instrument = None
+        elif param in config.get("instruments", {}):
+            instrument = param
+        else:
+            print("unknown instrument. instruments:", ", ".join(config.get("instruments", {})))
+        continue
+
+    # Settings for a single instrument override the top-level ones.
+    target = config if instrument is None else config["instruments"][instrument]
+    if command in ("add", "remove"):
+        target.setdefault("interesting_masses", list(config["interesting_masses"]))
+
     if command == "add":
         for i in param.split(" "):
-            config["interesting_masses"].append(to_number(i))
+            target["interesting_masses"].append(to_number(i))
     elif command == "remove":
         for i in param.split(" "):
-            config["interesting_masses"].remove(to_number(i))
+            target["interesting_masses"].remove(to_number(i))
     elif command == "masses":
-        config["interesting_masses"] = [to_number(i) for i in param.split(" ")]
+        target["interesting_masses"] = [to_number(i) for i in param.split(" ")]
     elif command == "onion":
-        config["onion_opacity"] = float(param)
+        target["onion_opacity"] = float(param)
     elif command == "floor":
-        config["pressure_floor"] = float(param)
+        target["pressure_floor"] = float(param)
+    elif command == "sweeps":
+        target["onion_sweeps"] = int(param)
+    elif command == "waterfall":
+        target["waterfall"] = float(param)
     else:
         print("invalid command. sorry this program is hard to use.")
-        print("commands: add, remove, masses, onion, floor")
+        print("commands: use, add, remove, masses, onion, floor, sweeps, waterfall")
         continue
 
     config["nonce"] += 1
-    config["interesting_masses"].sort()
-    with open("chamberplot_stream_config.json", "w") as file:
-        json.dump(config, file, indent=4)
+    if "interesting_masses" in target:
+        target["interesting_masses"].sort()
+    save_config(config) # all at once, so the plotters never read a half-written config